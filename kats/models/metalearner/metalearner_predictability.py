@@ -11,20 +11,206 @@ The predictability of a time series is determined by whether the forecasting err
 """
 
 import ast
+import itertools
+import json
 import logging
-from typing import Dict, List, Optional, Union, Any
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple, Union, Any
 
 import joblib
 import numpy as np
 import pandas as pd
+
+try:
+    from numba import njit, prange  # @manual
+
+    _no_numba = False
+except ImportError:
+    _no_numba = True
+
+    def njit(**kwargs):  # type: ignore
+        def njit_decorator(func):  # type: ignore
+            return func
+
+        return njit_decorator
+
+    prange = range
+
+try:
+    import onnxruntime  # @manual
+    from skl2onnx import convert_sklearn  # @manual
+    from skl2onnx.common.data_types import FloatTensorType  # @manual
+
+    _no_onnx = False
+except ImportError:
+    _no_onnx = True
+
+try:
+    import tl2cgen  # @manual
+    import treelite  # @manual
+
+    _no_treelite = False
+except ImportError:
+    _no_treelite = True
+
+try:
+    import lz4  # noqa # @manual
+
+    # LZ4 decompresses much faster than the zlib fallback.
+    _COMPRESS = ("lz4", 3)
+except ImportError:
+    _COMPRESS = ("zlib", 3)
+
 from kats.consts import TimeSeriesData
 from kats.tsfeatures.tsfeatures import TsFeatures
 from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
-from sklearn.metrics import precision_recall_curve, precision_recall_fscore_support
+from sklearn.metrics import precision_recall_fscore_support
 from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import GaussianNB
 from sklearn.neighbors import KNeighborsClassifier
 
+# Attributes needed for prediction, which are the only ones saved by save_model.
+_MODEL_ATTRS = [
+    "clf",
+    "_clf_threshold",
+    "_compiled_trees",
+    "features_mean",
+    "features_std",
+    "feature_columns",
+    "rescale",
+    "threshold",
+]
+
+
+def _parse_field(value: Any) -> Any:
+    """Parse a serialized meta-data field.
+
+    Fields are tried as JSON first, which is much cheaper than `ast.literal_eval`, and fall back to `ast.literal_eval` for Python literals (e.g., tuples or single-quoted strings).
+    """
+
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return ast.literal_eval(value)
+
+
+def _features_to_array(features: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[str]]:
+    """Stack feature dictionaries into a float32 matrix without building a DataFrame.
+
+    Columns are the union of the feature names in first-seen order, and missing or NaN features are filled with 0.
+    """
+
+    columns = list(features[0]) if features else []
+    # Fast path: TsFeatures produces the same features in the same order for
+    # every time series.
+    if all(list(feature) == columns for feature in features):
+        try:
+            arr = np.fromiter(
+                itertools.chain.from_iterable(feature.values() for feature in features),
+                dtype=np.float32,
+                count=len(features) * len(columns),
+            ).reshape(len(features), len(columns))
+            arr[np.isnan(arr)] = 0.0
+            return arr, columns
+        except (TypeError, ValueError):
+            # Some values cannot be converted directly, e.g., None.
+            pass
+
+    columns = list(dict.fromkeys(itertools.chain.from_iterable(features)))
+    col_idx = {col: i for i, col in enumerate(columns)}
+    arr = np.zeros((len(features), len(columns)), dtype=np.float32)
+    for row, feature in zip(arr, features):
+        for col, value in feature.items():
+            # NaN is the only value not equal to itself.
+            if value is not None and value == value:
+                row[col_idx[col]] = value
+    return arr, columns
+
+
+def _stratify_labels(labels: np.ndarray, split_size: int) -> Optional[np.ndarray]:
+    """Return labels for a stratified split of split_size samples, or None if sklearn cannot stratify it.
+
+    Stratification needs at least 2 samples per class, and both sides of the split must hold every class.
+    """
+
+    counts = np.bincount(labels)
+    n_classes = np.count_nonzero(counts)
+    if (
+        counts.min() < 2
+        or split_size < n_classes
+        or len(labels) - split_size < n_classes
+    ):
+        return None
+    return labels
+
+
+@njit(cache=True)
+def _best_threshold(
+    y_true: np.ndarray, y_score: np.ndarray, recall_threshold: float
+) -> float:
+    """Find the score threshold with the best precision among those whose recall is at least recall_threshold.
+
+    Scores are swept once in descending order, and precision and recall are only evaluated after the last of tied scores, like sklearn's precision_recall_curve.
+    Among thresholds with the same precision, the highest is returned. NaN is returned if no threshold reaches the recall.
+    """
+
+    order = np.argsort(-y_score)
+    n_pos = 0
+    for i in range(len(y_true)):
+        if y_true[i] == 1:
+            n_pos += 1
+    best_precision = -1.0
+    best_threshold = np.nan
+    if n_pos == 0:
+        return best_threshold
+    tp = 0
+    for i in range(len(order)):
+        if y_true[order[i]] == 1:
+            tp += 1
+        score = y_score[order[i]]
+        if i + 1 < len(order) and y_score[order[i + 1]] == score:
+            continue
+        precision = tp / (i + 1)
+        if tp / n_pos >= recall_threshold and precision > best_precision:
+            best_precision = precision
+            best_threshold = score
+    return best_threshold
+
+
+@njit(parallel=True, cache=True)
+def _predict_proba_trees(
+    x: np.ndarray,
+    feature: np.ndarray,
+    threshold: np.ndarray,
+    left: np.ndarray,
+    right: np.ndarray,
+    value: np.ndarray,
+    offsets: np.ndarray,
+) -> np.ndarray:
+    """Average the positive-class probabilities of a flattened tree ensemble.
+
+    Trees are stored back to back in the node arrays, with the root of tree t at offsets[t] and leaves marked by left == -1.
+    """
+
+    n = x.shape[0]
+    n_trees = len(offsets) - 1
+    out = np.zeros(n)
+    for i in prange(n):
+        s = 0.0
+        for t in range(n_trees):
+            node = offsets[t]
+            while left[node] != -1:
+                if x[i, feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            s += value[node]
+        out[i] = s / n_trees
+    return out
+
 
 class MetaLearnPredictability:
     """Meta-learner framework on predictability.
@@ -32,7 +218,7 @@ class MetaLearnPredictability:
     we define the time series with error metrics less than a user defined threshold as predictable).
     For training, it uses time series features as inputs and whether the best forecasting models' errors less than the user-defined threshold as labels.
     For prediction, it takes time series or time series features as inputs to predict whether the corresponding time series is predictable or not.
-    This class provides preprocess, pred, pred_by_feature, save_model and load_model.
+    This class provides preprocess, pred, pred_batch, pred_by_feature, compile, export_onnx, load_onnx, save_model and load_model.
 
     Attributes:
         metadata: Optional; A list of dictionaries representing the meta-data of time series (e.g., the meta-data generated by GetMetaData object).
@@ -47,6 +233,7 @@ class MetaLearnPredictability:
         >>> mlp.train()
         >>> mlp.save_model()
         >>> mlp.pred(TSdata) # Predict whether a time series is predictable.
+        >>> mlp.pred_batch([TSdata1, TSdata2]) # Predict for a list of time series at once.
         >>> mlp2 = MetaLearnPredictability(load_model=True) # Create a new object to load the trained model
         >>> mlp2.load_model()
     """
@@ -57,6 +244,8 @@ class MetaLearnPredictability:
         threshold: float = 0.2,
         load_model=False,
     ) -> None:
+        self._reset_predictors()
+        self._tsfeatures = TsFeatures()
         if load_model:
             msg = "Initialize this class without meta data, and a pretrained model should be loaded using .load_model() method."
             logging.info(msg)
@@ -98,36 +287,50 @@ class MetaLearnPredictability:
 
         metadata = self.metadata
 
-        self.features = []
-        self.labels = []
-
-        for i in range(len(metadata)):
+        errors = []
+        features = []
+        for meta in metadata:
             try:
-                if isinstance(metadata[i]["hpt_res"], str):
-                    hpt = ast.literal_eval(metadata[i]["hpt_res"])
-                else:
-                    hpt = metadata[i]["hpt_res"]
-
-                if isinstance(metadata[i]["features"], str):
-                    feature = ast.literal_eval(metadata[i]["features"])
-                else:
-                    feature = metadata[i]["features"]
-
-                self.features.append(feature)
-                self.labels.append(hpt[metadata[i]["best_model"]][1])
+                hpt = _parse_field(meta["hpt_res"])
+                feature = _parse_field(meta["features"])
+                error = hpt[meta["best_model"]][1]
             except Exception as e:
                 logging.exception(e)
-        self.labels = (np.array(self.labels) > self.threshold).astype(int)
-        self.features = pd.DataFrame(self.features)
-        self.features.fillna(0, inplace=True)
-        self.features_mean = np.average(self.features.values, axis=0)
-
-        self.features_std = np.std(self.features.values, axis=0)
+                continue
+            errors.append(error)
+            features.append(feature)
+
+        labels = np.fromiter(errors, dtype=np.float64, count=len(errors))
+        self.labels = (labels > self.threshold).astype(np.int8)
+        self.features, self.feature_columns = _features_to_array(features)
+
+        # Compute the first two moments with float64 accumulators instead of
+        # separate np.average/np.std calls, which walk the matrix three times.
+        n = self.features.shape[0]
+        s1 = self.features.sum(axis=0, dtype=np.float64)
+        s2 = np.einsum("ij,ij->j", self.features, self.features, dtype=np.float64)
+        mean = s1 / n
+        # Cancellation can leave rounding error (even negative values) that
+        # grows with n, so constant features are detected directly.
+        var = np.maximum(s2 / n - mean**2, 0.0)
+        if n > 0:
+            var[self.features.min(axis=0) == self.features.max(axis=0)] = 0.0
+        self.features_mean = mean.astype(np.float32)
+        self.features_std = np.sqrt(var).astype(np.float32)
 
         self.features_std[self.features_std == 0] = 1.0
+        self._set_standardization()
 
         return
 
+    def _set_standardization(self) -> None:
+        """Precompute standardization as a fused affine transform: x * inv_std + neg_mean_inv_std."""
+
+        self._inv_std = (1.0 / self.features_std).astype(np.float32)
+        self._neg_mean_inv_std = (-self.features_mean * self._inv_std).astype(
+            np.float32
+        )
+
     def _validate_data(self) -> None:
         """Validate input data.
 
@@ -148,13 +351,18 @@ class MetaLearnPredictability:
     def preprocess(self) -> None:
         """Rescale input time series features to zero-mean and unit-variance.
 
+        Features are only rescaled once, and repeated calls have no effect.
+
         Returns:
             None.
         """
 
+        if self.rescale:
+            logging.info("Features have already been rescaled.")
+            return
         self.rescale = True
-        features = (self.features.values - self.features_mean) / self.features_std
-        self.features = pd.DataFrame(features, columns=self.features.columns)
+        np.multiply(self.features, self._inv_std, out=self.features)
+        np.add(self.features, self._neg_mean_inv_std, out=self.features)
 
     def train(
         self,
@@ -196,13 +404,22 @@ class MetaLearnPredictability:
             logging.warning(msg)
 
         n = len(self.features)
+        # Stratify the splits so that both classes show up in validation and test sets.
+        n_valid = int(n * valid_size)
         x_train, x_valid, y_train, y_valid = train_test_split(
-            self.features, self.labels, test_size=int(n * valid_size)
+            self.features,
+            self.labels,
+            test_size=n_valid,
+            stratify=_stratify_labels(self.labels, n_valid),
         )
 
         if test_size > 0 and test_size < (1 - valid_size):
+            n_test = int(n * test_size)
             x_train, x_test, y_train, y_test = train_test_split(
-                x_train, y_train, test_size=int(n * test_size)
+                x_train,
+                y_train,
+                test_size=n_test,
+                stratify=_stratify_labels(y_train, n_test),
             )
         elif test_size == 0:
             x_train, y_train = self.features, self.labels
@@ -221,17 +438,16 @@ class MetaLearnPredictability:
             clf = KNeighborsClassifier(**kwargs)
         else:
             kwargs["n_estimators"] = n_estimators
-            kwargs["class_weight"] = kwargs.get("class_weight", "balanced_subsample")
+            kwargs.setdefault("class_weight", "balanced_subsample")
+            kwargs.setdefault("n_jobs", -1)
             clf = RandomForestClassifier(**kwargs)
-        clf.fit(x_train, y_train)
+        # Trees release the GIL while fitting, so threads avoid process start-up costs.
+        with joblib.parallel_backend("threading"):
+            clf.fit(x_train, y_train)
         pred_valid = clf.predict_proba(x_valid)[:, 1]
-        p, r, threshold = precision_recall_curve(y_valid, pred_valid)
-        try:
-            clf_threshold = threshold[np.where(p == np.max(p[r >= recall_threshold]))][
-                -1
-            ]
-        except Exception as e:
-            msg = f"Fail to get a proper threshold for recall {recall_threshold}, use 0.5 as threshold instead. Exception message is: {e}"
+        clf_threshold = _best_threshold(y_valid, pred_valid, recall_threshold)
+        if np.isnan(clf_threshold):
+            msg = f"Fail to get a proper threshold for recall {recall_threshold}, use 0.5 as threshold instead."
             logging.warning(msg)
             clf_threshold = 0.5
         if x_test is not None:
@@ -250,46 +466,249 @@ class MetaLearnPredictability:
             ans = {}
         self.clf = clf
         self._clf_threshold = clf_threshold
+        self._reset_predictors()
         return ans
 
-    def pred(self, source_ts: TimeSeriesData, ts_rescale: bool = True) -> bool:
-        """Predict whether a time series is predicable or not.
+    def compile(self, backend: str = "numba") -> None:
+        """Compile the trained random forest into a faster predictor.
+
+        With backend 'numba', the trees of the classifier are flattened into node arrays and walked in a parallel numba kernel.
+        With backend 'treelite', the trees are compiled ahead of time into a native shared library with treelite.
+        Either way, pred and pred_by_feature then use the compiled predictor instead of the classifier's predict_proba.
+        The compiled predictor is discarded when the model is re-trained.
 
         Args:
-            source_ts: :class:`kats.consts.TimeSeriesData` object representing the new time series data.
-            ts_scale: Optional; A boolean to specify whether or not to rescale time series data (i.e., normalizing it with its maximum vlaue) before calculating features. Default is True.
+            backend: Optional; A string representing the compilation backend. Can be 'numba' or 'treelite'. Default is 'numba'.
 
         Returns:
-            A boolean representing whether the time series is predictable or not.
+            None.
         """
 
-        ts = TimeSeriesData(pd.DataFrame(source_ts.to_dataframe().copy()))
+        if backend not in ["numba", "treelite"]:
+            msg = "Only support numba and treelite backend."
+            logging.error(msg)
+            raise ValueError(msg)
+        if not isinstance(self.clf, RandomForestClassifier):
+            msg = "Only a trained RandomForest classifier can be compiled."
+            logging.error(msg)
+            raise ValueError(msg)
+        if backend == "treelite":
+            self._compile_treelite()
+        else:
+            self._compile_numba()
+
+    def _compile_numba(self) -> None:
+        """Flatten the trees of the random forest into node arrays for numba."""
+
+        if _no_numba:
+            raise RuntimeError("requires numba to be installed")
+        trees = [est.tree_ for est in self.clf.estimators_]
+        offsets = np.zeros(len(trees) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([tree.node_count for tree in trees])
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets[:-1]):
+            is_leaf = tree.children_left == -1
+            feature.append(tree.feature)
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            counts = tree.value[:, 0, :]
+            value.append(counts[:, 1] / counts.sum(axis=1))
+        self._reset_predictors()
+        self._compiled_trees = (
+            np.concatenate(feature).astype(np.int64),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(left).astype(np.int64),
+            np.concatenate(right).astype(np.int64),
+            np.concatenate(value).astype(np.float64),
+            offsets,
+        )
+
+    def _compile_treelite(self) -> None:
+        """Compile the random forest into a native shared library with treelite."""
+
+        if _no_treelite:
+            raise RuntimeError("requires treelite and tl2cgen to be installed")
+        model = treelite.sklearn.import_model(self.clf)
+        self._reset_predictors()
+        # The library lives as long as the predictor and is removed by _reset_predictors.
+        self._treelite_dir = tempfile.TemporaryDirectory()
+        libpath = os.path.join(self._treelite_dir.name, "mlp_rf.so")
+        tl2cgen.export_lib(
+            model,
+            toolchain="gcc",
+            libpath=libpath,
+            params={"parallel_comp": os.cpu_count() or 1},
+        )
+        self._treelite_predictor = tl2cgen.Predictor(libpath)
+        logging.info(f"Successfully compile the model: {libpath}.")
+
+    def export_onnx(self, file_path: str) -> None:
+        """Export the trained classifier to an ONNX model.
+
+        The exported model can be served with onnxruntime, either through load_onnx or from other languages.
+        KNN classifiers are not supported. onnxruntime sums the tree outputs in float32, so a RandomForest model may
+        flip the rare predictions whose probability lies within about 1e-7 of the threshold.
+
+        Args:
+            file_path: A string representing the path to save the ONNX model.
+
+        Returns:
+            None.
+        """
+
+        if _no_onnx:
+            raise RuntimeError("requires skl2onnx and onnxruntime to be installed")
         if self.clf is None:
-            msg = "No model trained yet, please train the model first."
+            msg = "Please train the model first!"
+            logging.error(msg)
+            raise ValueError(msg)
+        if isinstance(self.clf, KNeighborsClassifier):
+            msg = "KNN classifier cannot be exported to ONNX."
             logging.error(msg)
             raise ValueError(msg)
+        onx = convert_sklearn(
+            self.clf,
+            initial_types=[("X", FloatTensorType([None, len(self.features_mean)]))],
+            # Output probabilities as a tensor rather than a list of dictionaries.
+            options={id(self.clf): {"zipmap": False}},
+        )
+        with open(file_path, "wb") as f:
+            f.write(onx.SerializeToString())
+        logging.info(f"Successfully export the ONNX model: {file_path}.")
+
+    def load_onnx(self, file_path: str) -> None:
+        """Load an ONNX model exported by export_onnx, which pred and pred_by_feature then run with onnxruntime.
+
+        Only the classifier is replaced: the model must still be trained or loaded with load_model first, which provides
+        the rescaling statistics and the classification threshold.
+
+        Args:
+            file_path: A string representing the path to load the ONNX model.
+
+        Returns:
+            None.
+        """
+
+        if _no_onnx:
+            raise RuntimeError("requires skl2onnx and onnxruntime to be installed")
+        if self.clf is None:
+            msg = "Please train or load the model first!"
+            logging.error(msg)
+            raise ValueError(msg)
+        self._reset_predictors()
+        self._onnx_session = onnxruntime.InferenceSession(
+            file_path, providers=["CPUExecutionProvider"]
+        )
+        logging.info(f"Successfully load the ONNX model: {file_path}.")
+
+    def _reset_predictors(self) -> None:
+        """Discard the compiled and ONNX predictors."""
+
+        self._compiled_trees = None
+        self._treelite_predictor = None
+        if getattr(self, "_treelite_dir", None) is not None:
+            self._treelite_dir.cleanup()
+        self._treelite_dir = None
+        self._onnx_session = None
+
+    def _predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Predict the positive-class probabilities of the features x."""
+
+        if self._onnx_session is not None:
+            x = np.ascontiguousarray(x, dtype=np.float32)
+            # The second output holds the class probabilities.
+            return self._onnx_session.run(None, {"X": x})[1][:, 1]
+        if self._treelite_predictor is not None:
+            x = np.asarray(x, dtype=np.float32)
+            proba = self._treelite_predictor.predict(tl2cgen.DMatrix(x))
+            # The last column holds the positive-class probabilities.
+            return proba.reshape(x.shape[0], -1)[:, -1]
+        if self._compiled_trees is not None:
+            # Trees compare float32 features, as sklearn does internally.
+            x = np.ascontiguousarray(x, dtype=np.float32)
+            return _predict_proba_trees(x, *self._compiled_trees)
+        return self.clf.predict_proba(x)[:, 1]
+
+    def _get_ts_features(
+        self, source_ts: TimeSeriesData, ts_rescale: bool
+    ) -> np.ndarray:
+        """Calculate the time series features of source_ts as a np.ndarray."""
+
         if ts_rescale:
-            ts.value /= ts.value.max()
+            value = source_ts.value
+            ts = TimeSeriesData(time=source_ts.time, value=value / value.max())
             msg = "Successful scaled! Each value of TS has been divided by the max value of TS."
             logging.info(msg)
-        features = TsFeatures().transform(ts)
-        # pyre-fixme[16]: `List` has no attribute `values`.
-        x = np.array(list(features.values()))
+        else:
+            ts = source_ts
+        features = self._tsfeatures.transform(ts)
+        x = np.fromiter(
+            # pyre-fixme[16]: `List` has no attribute `values`.
+            features.values(),
+            dtype=np.float32,
+            count=len(features),
+        )
         if np.sum(np.isnan(x)) > 0:
             msg = (
                 "Features of ts contain NaN, please consider preprocessing ts. Features are: "
                 f"{features}. Fill in NaNs with 0."
             )
             logging.warning(msg)
-        ans = True if self.pred_by_feature([x])[0] == 1 else False
+        return x
+
+    def pred(self, source_ts: TimeSeriesData, ts_rescale: bool = True) -> bool:
+        """Predict whether a time series is predicable or not.
+
+        Args:
+            source_ts: :class:`kats.consts.TimeSeriesData` object representing the new time series data.
+            ts_scale: Optional; A boolean to specify whether or not to rescale time series data (i.e., normalizing it with its maximum vlaue) before calculating features. Default is True.
+
+        Returns:
+            A boolean representing whether the time series is predictable or not.
+        """
+
+        if self.clf is None:
+            msg = "No model trained yet, please train the model first."
+            logging.error(msg)
+            raise ValueError(msg)
+        x = self._get_ts_features(source_ts, ts_rescale)
+        ans = True if self._pred_by_feature(x.reshape(1, -1))[0] == 1 else False
         return ans
 
+    def pred_batch(
+        self, source_ts_list: List[TimeSeriesData], ts_rescale: bool = True
+    ) -> np.ndarray:
+        """Predict whether a list of time series are predicable or not.
+
+        Compared with calling pred on each time series, the classifier is only called once for the whole list.
+
+        Args:
+            source_ts_list: A list of :class:`kats.consts.TimeSeriesData` objects representing the new time series data.
+            ts_scale: Optional; A boolean to specify whether or not to rescale time series data (i.e., normalizing it with its maximum vlaue) before calculating features. Default is True.
+
+        Returns:
+            A np.ndarray of booleans representing whether the corresponding time series are predictable or not.
+        """
+
+        if self.clf is None:
+            msg = "No model trained yet, please train the model first."
+            logging.error(msg)
+            raise ValueError(msg)
+        if len(source_ts_list) == 0:
+            msg = "source_ts_list should contain at least one time series."
+            logging.error(msg)
+            raise ValueError(msg)
+        x = np.vstack([self._get_ts_features(ts, ts_rescale) for ts in source_ts_list])
+        return self._pred_by_feature(x) == 1
+
     def pred_by_feature(
         self, source_x: Union[np.ndarray, List[np.ndarray], pd.DataFrame]
     ) -> np.ndarray:
         """Predict whether a list of time series are predicable or not given their time series features.
         Args:
             source_x: the time series features of the time series that one wants to predict, can be a np.ndarray, a list of np.ndarray or a pd.DataFrame.
+                      The columns of a pd.DataFrame are matched to the training features by name.
 
         Returns:
             A np.array storing whether the corresponding time series are predictable or not.
@@ -299,23 +718,43 @@ class MetaLearnPredictability:
             msg = "No model trained yet, please train the model first."
             logging.error(msg)
             raise ValueError(msg)
-        if isinstance(source_x, List):
-            x = np.row_stack(source_x)
+        # x is modified in place below, so the inputs are always copied
+        # (together with the conversion to float32).
+        if isinstance(source_x, list):
+            x = np.row_stack(source_x).astype(np.float32, copy=False)
         elif isinstance(source_x, np.ndarray):
-            x = source_x.copy()
+            x = source_x.astype(np.float32)
+        elif isinstance(source_x, pd.DataFrame):
+            # Models saved before feature_columns was kept match columns by position.
+            if self.feature_columns is not None:
+                missing = [c for c in self.feature_columns if c not in source_x]
+                if missing:
+                    msg = f"source_x is missing the features: {missing}."
+                    logging.error(msg)
+                    raise ValueError(msg)
+                source_x = source_x[self.feature_columns]
+            x = source_x.to_numpy(dtype=np.float32, copy=True)
         else:
             msg = f"In valid source_x type: {type(source_x)}."
             logging.error(msg)
             raise ValueError(msg)
-        x[np.isnan(x)] = 0.0
+        return self._pred_by_feature(x)
+
+    def _pred_by_feature(self, x: np.ndarray) -> np.ndarray:
+        """Predict given a float32 feature array x, which is modified in place."""
+
+        np.nan_to_num(x, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
         if self.rescale:
-            x = (x - self.features_mean) / self.features_std
-        pred = (self.clf.predict_proba(x)[:, 1] < self._clf_threshold).astype(int)
+            np.multiply(x, self._inv_std, out=x)
+            np.add(x, self._neg_mean_inv_std, out=x)
+        pred = (self._predict_proba(x) < self._clf_threshold).astype(int)
         return pred
 
     def save_model(self, file_path: str) -> None:
         """Save the trained model.
 
+        Only the attributes needed for prediction are saved, and the file is compressed.
+
         Args:
             file_name: A string representing the path to save the trained model.
 
@@ -326,7 +765,8 @@ class MetaLearnPredictability:
             msg = "Please train the model first!"
             logging.error(msg)
             raise ValueError(msg)
-        joblib.dump(self.__dict__, file_path)
+        model = {attr: getattr(self, attr) for attr in _MODEL_ATTRS}
+        joblib.dump(model, file_path, compress=_COMPRESS)
         logging.info(f"Successfully save the model: {file_path}.")
 
     def load_model(self, file_path) -> None:
@@ -339,7 +779,11 @@ class MetaLearnPredictability:
             None.
         """
         try:
-            self.__dict__ = joblib.load(file_path)
+            self._reset_predictors()
+            self.__dict__.update(joblib.load(file_path))
+            # Models saved with the whole __dict__ predate feature_columns.
+            self.__dict__.setdefault("feature_columns", None)
+            self._set_standardization()
             logging.info(f"Successfully load the model: {file_path}.")
         except Exception as e:
             msg = f"Fail to load model with Exception msg: {e}"
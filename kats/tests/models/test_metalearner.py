@@ -5,10 +5,15 @@
 # pyre-unsafe
 
 import collections
+import json
 import logging
+import os
 import random
+import tempfile
+import unittest
 from unittest import TestCase
 
+import joblib
 import numpy as np
 import pandas as pd
 from ax.modelbridge.registry import Models, SearchSpace
@@ -22,6 +27,10 @@ from kats.models.metalearner.metalearner_modelselect import (
     MetaLearnModelSelect,
 )
 from kats.models.metalearner.metalearner_predictability import (
+    _best_threshold,
+    _features_to_array,
+    _no_onnx,
+    _no_treelite,
     MetaLearnPredictability,
 )
 from kats.models.prophet import ProphetModel
@@ -34,6 +43,7 @@ from kats.tests.models.test_models_dummy_data import (
     METALEARNING_TEST_FEATURES,
     METALEARNING_TEST_MULTI,
 )
+from sklearn.metrics import precision_recall_curve
 
 # TS which is too short
 TSData_short = TimeSeriesData(METALEARNING_TEST_T2.iloc[:8, :])
@@ -298,6 +308,9 @@ class MetaLearnPredictabilityTest(TestCase):
         )
 
         mlp.pred(t2)
+        # Test batch prediction agrees with per-series prediction
+        np.testing.assert_array_equal(mlp.pred_batch([t1, t2]), [ts_pred, mlp.pred(t2)])
+        self.assertRaises(ValueError, mlp.pred_batch, [])
         feature2 = feature.copy()
         mlp.pred_by_feature(feature)
         # Test if the target TimeSeriesData keeps its original value
@@ -305,6 +318,224 @@ class MetaLearnPredictabilityTest(TestCase):
         # Test if the features keep their original values
         equals(feature, feature2)
 
+    def test_parse_metadata(self) -> None:
+        metadata = [
+            {
+                "hpt_res": {
+                    m: ({"param": 1}, float(res[1])) for m, res in d["hpt_res"].items()
+                },
+                "features": {k: float(v) for k, v in d["features"].items()},
+                "best_model": str(d["best_model"]),
+            }
+            for d in METALEARNING_METADATA
+        ]
+        mlp = MetaLearnPredictability(metadata)
+        # Meta data serialized as JSON strings
+        json_metadata = [
+            dict(
+                d, hpt_res=json.dumps(d["hpt_res"]), features=json.dumps(d["features"])
+            )
+            for d in metadata
+        ]
+        # Meta data serialized as Python literals (with tuples)
+        repr_metadata = [
+            dict(d, hpt_res=str(d["hpt_res"]), features=str(d["features"]))
+            for d in metadata
+        ]
+        for data in [json_metadata, repr_metadata]:
+            mlp2 = MetaLearnPredictability(data)
+            np.testing.assert_array_equal(mlp2.features, mlp.features)
+            np.testing.assert_array_equal(mlp2.labels, mlp.labels)
+            self.assertEqual(mlp2.feature_columns, mlp.feature_columns)
+
+    def test_preprocess(self) -> None:
+        mlp = MetaLearnPredictability(METALEARNING_METADATA)
+        mlp.preprocess()
+        features = mlp.features.copy()
+        # Rescaling twice should not change the features again
+        mlp.preprocess()
+        np.testing.assert_array_equal(mlp.features, features)
+
+    def test_preprocess_constant_feature(self) -> None:
+        # The rounding error of the moments grows with the number of rows
+        n = 10000
+        rng = np.random.RandomState(560)
+        metadata = [
+            {
+                "hpt_res": {"arima": ({}, error)},
+                "features": {"const": 0.001, "x": x},
+                "best_model": "arima",
+            }
+            for error, x in zip(rng.uniform(0, 0.4, n), rng.randn(n))
+        ]
+        mlp = MetaLearnPredictability(metadata)
+        self.assertEqual(mlp.feature_columns, ["const", "x"])
+        # Constant features are not scaled up
+        self.assertEqual(mlp.features_std[0], 1.0)
+        self.assertAlmostEqual(
+            float(mlp.features_std[1]), np.std(mlp.features[:, 1]), 5
+        )
+
+    def test_pred_by_feature_dataframe(self) -> None:
+        mlp = MetaLearnPredictability(METALEARNING_METADATA)
+        mlp.preprocess()
+        mlp.train()
+        ans = mlp.pred_by_feature(feature)
+        df = pd.DataFrame(feature, columns=mlp.feature_columns)
+        np.testing.assert_array_equal(mlp.pred_by_feature(df), ans)
+        # Columns are matched by name, whatever their order, and extra ones are ignored
+        df2 = df[df.columns[::-1]].assign(extra=1.0)
+        np.testing.assert_array_equal(mlp.pred_by_feature(df2), ans)
+        self.assertRaises(ValueError, mlp.pred_by_feature, df.drop(columns="0"))
+
+    def test_train_small_split(self) -> None:
+        mlp = MetaLearnPredictability(METALEARNING_METADATA)
+        mlp.preprocess()
+        # Splits of a single sample cannot be stratified over both classes
+        mlp.train(valid_size=0.03, test_size=0.03)
+        self.assertIsNotNone(mlp.clf)
+
+    def test_save_load_model(self) -> None:
+        mlp = MetaLearnPredictability(METALEARNING_METADATA)
+        mlp.preprocess()
+        mlp.train()
+        ans = mlp.pred_by_feature(feature)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Test a plain model and a compiled model
+            for compiled in [False, True]:
+                if compiled:
+                    mlp.compile()
+                file_path = os.path.join(tmpdir, f"model_{compiled}.pkl")
+                mlp.save_model(file_path)
+                mlp2 = MetaLearnPredictability(load_model=True)
+                mlp2.load_model(file_path)
+                self.assertEqual(mlp2._compiled_trees is not None, compiled)
+                np.testing.assert_array_equal(mlp2.pred_by_feature(feature), ans)
+
+            # Test a model saved with the whole __dict__ can be loaded and saved again
+            old_path = os.path.join(tmpdir, "old_model.pkl")
+            old_dict = dict(mlp.__dict__)
+            for attr in ["feature_columns", "_compiled_trees", "_tsfeatures"]:
+                old_dict.pop(attr)
+            joblib.dump(old_dict, old_path)
+            mlp3 = MetaLearnPredictability(load_model=True)
+            mlp3.load_model(old_path)
+            np.testing.assert_array_equal(mlp3.pred_by_feature(feature), ans)
+            mlp3.save_model(os.path.join(tmpdir, "resaved_model.pkl"))
+
+    def test_features_to_array(self) -> None:
+        # Columns are the union in first-seen order; missing, None and NaN become 0
+        arr, columns = _features_to_array(
+            [{"a": 1.0, "b": 2.0}, {"b": 3.0, "c": 4.0}, {"a": None, "c": np.nan}]
+        )
+        self.assertEqual(columns, ["a", "b", "c"])
+        self.assertEqual(arr.dtype, np.float32)
+        np.testing.assert_array_equal(
+            arr, np.array([[1, 2, 0], [0, 3, 4], [0, 0, 0]], dtype=np.float32)
+        )
+
+        # The fast path for identically ordered rows matches the general fallback
+        features = [
+            {"x": 0.5, "y": np.nan, "z": -1.0},
+            {"x": 2.0, "y": 3.0, "z": np.nan},
+        ]
+        fast, fast_columns = _features_to_array(features)
+        # Reordering a row's keys forces the fallback
+        slow, slow_columns = _features_to_array(
+            [features[0], dict(reversed(list(features[1].items())))]
+        )
+        self.assertEqual(fast_columns, ["x", "y", "z"])
+        self.assertEqual(slow_columns, fast_columns)
+        np.testing.assert_array_equal(fast, slow)
+        np.testing.assert_array_equal(
+            fast, np.array([[0.5, 0, -1], [2, 3, 0]], dtype=np.float32)
+        )
+
+        arr, columns = _features_to_array([])
+        self.assertEqual(columns, [])
+        self.assertEqual(arr.shape, (0, 0))
+
+    def test_best_threshold(self) -> None:
+        def pr_curve_threshold(y, scores, recall_threshold):
+            # Highest threshold with the best precision meeting recall_threshold
+            p, r, thresholds = precision_recall_curve(y, scores)
+            mask = r[:-1] >= recall_threshold
+            if not mask.any():
+                return np.nan
+            masked_p = np.where(mask, p[:-1], -np.inf)
+            return thresholds[np.flatnonzero(masked_p == masked_p.max())[-1]]
+
+        rng = np.random.RandomState(560)
+        for _ in range(200):
+            n = rng.randint(5, 60)
+            y = rng.randint(0, 2, n).astype(np.int8)
+            if y.sum() == 0:
+                continue
+            # Rounded scores contain many ties, like random forest probabilities
+            scores = np.round(rng.uniform(0, 1, n), rng.randint(1, 3))
+            recall_threshold = rng.uniform(0, 1)
+            np.testing.assert_equal(
+                _best_threshold(y, scores, recall_threshold),
+                pr_curve_threshold(y, scores, recall_threshold),
+            )
+
+        y = np.array([1, 0, 1, 0, 0], dtype=np.int8)
+        scores = np.array([0.9, 0.9, 0.5, 0.1, 0.1])
+        # Tied scores can only be thresholded together, so 0.9 has precision 0.5
+        self.assertEqual(_best_threshold(y, scores, 0.5), 0.5)
+        # No threshold meets the recall
+        self.assertTrue(np.isnan(_best_threshold(y, scores, 1.1)))
+        self.assertTrue(np.isnan(_best_threshold(np.zeros(5, np.int8), scores, 0.5)))
+
+    def test_compile(self) -> None:
+        mlp = MetaLearnPredictability(METALEARNING_METADATA)
+        mlp.preprocess()
+        mlp.train()
+        ans = mlp.pred_by_feature(feature)
+        mlp.compile()
+        # The compiled forest should agree with the sklearn classifier
+        np.testing.assert_array_equal(mlp.pred_by_feature(feature), ans)
+
+        mlp.train(method="KNN")
+        self.assertRaises(ValueError, mlp.compile)
+
+    @unittest.skipIf(_no_treelite, "requires treelite and tl2cgen to be installed")
+    def test_compile_treelite(self) -> None:
+        mlp = MetaLearnPredictability(METALEARNING_METADATA)
+        mlp.preprocess()
+        mlp.train()
+        ans = mlp.pred_by_feature(feature)
+        mlp.compile(backend="treelite")
+        # The compiled forest should agree with the sklearn classifier
+        np.testing.assert_array_equal(mlp.pred_by_feature(feature), ans)
+
+        # Re-training should remove the compiled library
+        libdir = mlp._treelite_dir.name
+        mlp.train()
+        self.assertIsNone(mlp._treelite_predictor)
+        self.assertFalse(os.path.exists(libdir))
+
+    @unittest.skipIf(_no_onnx, "requires skl2onnx and onnxruntime to be installed")
+    def test_onnx(self) -> None:
+        mlp = MetaLearnPredictability(METALEARNING_METADATA)
+        mlp.preprocess()
+        # An untrained model has neither a classifier to export nor a threshold
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "mlp.onnx")
+            self.assertRaises(ValueError, mlp.export_onnx, path)
+            self.assertRaises(ValueError, mlp.load_onnx, path)
+
+            mlp.train(method="GBDT")
+            ans = mlp.pred_by_feature(feature)
+            mlp.export_onnx(path)
+            mlp.load_onnx(path)
+            self.assertIsNotNone(mlp._onnx_session)
+            np.testing.assert_array_equal(mlp.pred_by_feature(feature), ans)
+
+            mlp.train(method="KNN")
+            self.assertIsNone(mlp._onnx_session)
+            self.assertRaises(ValueError, mlp.export_onnx, path)
+
 
 class MetaLearnHPTTest(TestCase):
     def test_default_models(self) -> None: